@@ -1,19 +1,27 @@
 # backend/app.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator, model_validator
 from typing import List, Optional, Dict, Any
 import os
 import shutil
 import uuid
+import tempfile
 from deepgram import DeepgramClient, PrerecordedOptions
 from dotenv import load_dotenv
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import json
+import orjson
 import asyncio
 from enum import Enum
 import time
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from contextlib import asynccontextmanager
 import subprocess
 import requests
 import re
@@ -23,8 +31,19 @@ from supadata import Supadata, SupadataError
 import PyPDF2
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import BaseTarget
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created at startup so the semaphores belong to the server's event loop
+    global DG_SEM, GROQ_SEM, UPLOAD_SEM
+    DG_SEM = asyncio.Semaphore(DEEPGRAM_CONCURRENCY)
+    GROQ_SEM = asyncio.Semaphore(GROQ_CONCURRENCY)
+    UPLOAD_SEM = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow frontend to connect
 app.add_middleware(
@@ -54,20 +73,76 @@ if not SUPADATA_API_KEY:
 
 supadata = Supadata(api_key=SUPADATA_API_KEY)
 
+# Initialize the Deepgram client once instead of on every request
+deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+
 
 # Initialize Groq client if API key is available
 groq_client = None
 if GROQ_API_KEY:
     try:
-        from groq import Groq
-        groq_client = Groq(api_key=GROQ_API_KEY)
+        import httpx
+        from groq import Groq, DefaultHttpxClient
+        # Keep up to 100 idle connections open for concurrent requests, on top of
+        # the SDK's own client defaults
+        groq_client = Groq(
+            api_key=GROQ_API_KEY,
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+            )
+        )
     except ImportError:
         print("Warning: Groq package not installed. Install with: pip install groq")
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = "uploads"
+# Summaries are simple enough for the small model; quizzes need the 70B model
+# to write good distractors
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+QUIZ_MODEL = "llama-3.3-70b-versatile"
+
+# Create uploads directory if it doesn't exist. Temporary uploads default to
+# tmpfs so they never touch the disk
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/dev/shm/edubot-uploads" if os.path.isdir("/dev/shm") else "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Copy uploads in 1 MiB chunks instead of the 64 KiB stdlib default
+UPLOAD_COPY_BUFSIZE = 1 << 20
+
+# Audio uploads are kept in memory up to this size before spilling to disk.
+# The spill goes to SPOOL_DIR (the system temp dir by default), never to the
+# tmpfs-backed UPLOAD_DIR, so large recordings do not end up in RAM anyway
+AUDIO_SPOOL_MAX_SIZE = 50 * 1024 * 1024
+SPOOL_DIR = os.getenv("SPOOL_DIR") or None
+
+# Larger upload bodies are rejected with 413
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(500 * 1024 * 1024)))
+
+# Leading bytes of supported audio containers as (offset, signature)
+AUDIO_SIGNATURES = (
+    (0, b"RIFF"),              # WAV
+    (0, b"OggS"),              # Ogg / Opus
+    (0, b"ID3"),               # MP3 with ID3 tag
+    (0, b"fLaC"),              # FLAC
+    (0, b"\xff\xfb"),          # MP3 frame (MPEG-1 Layer III)
+    (0, b"\xff\xfa"),
+    (0, b"\xff\xf3"),          # MP3 frame (MPEG-2 Layer III)
+    (0, b"\xff\xf2"),
+    (0, b"\xff\xe3"),          # MP3 frame (MPEG-2.5 Layer III)
+    (0, b"\xff\xe2"),
+    (0, b"\xff\xf1"),          # AAC ADTS
+    (0, b"\xff\xf9"),
+    (0, b"\x1aE\xdf\xa3"),      # WebM / Matroska (browser recordings)
+    (0, b"FORM"),              # AIFF
+    (0, b"#!AMR"),             # AMR
+    (0, b"caff"),              # Core Audio Format
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"),  # WMA (ASF container)
+    (4, b"ftyp"),              # MP4 / M4A
+)
+AUDIO_HEADER_SIZE = 16
+
+# Transcriptions of recently uploaded audio, keyed by content digest
+TRANSCRIPTION_CACHE_SIZE = 64
+transcription_cache = OrderedDict()
+
 # Define the teaching modes
 class TeachingMode(str, Enum):
     SOCRATIC = "socratic"
@@ -76,12 +151,66 @@ class TeachingMode(str, Enum):
     COLLEGE = "college"
     PHD = "phd"
 
+# Maximum in-flight calls per upstream provider, and how long a request may
+# queue for a slot before it is turned away with 429
+DEEPGRAM_CONCURRENCY = int(os.getenv("DEEPGRAM_CONCURRENCY", "16"))
+GROQ_CONCURRENCY = int(os.getenv("GROQ_CONCURRENCY", "32"))
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "30"))
+DG_SEM = None
+GROQ_SEM = None
+
+# Maximum audio uploads being received or spooled at once, bounding the memory
+# held by upload spools independently of the Deepgram limit
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "16"))
+UPLOAD_SEM = None
+
+class ConcurrencySlot:
+    """
+    A held semaphore slot that is safe to release more than once
+    """
+    def __init__(self, semaphore):
+        self.semaphore = semaphore
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.semaphore.release()
+
+async def acquire_slot(semaphore):
+    """
+    Take a slot for an upstream call, or reply 429 if none frees up in time
+    """
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": str(int(QUEUE_TIMEOUT))}
+        )
+    return ConcurrencySlot(semaphore)
+
+@asynccontextmanager
+async def limit_concurrency(semaphore):
+    """
+    Hold a slot for the duration of an upstream call
+    """
+    slot = await acquire_slot(semaphore)
+    try:
+        yield
+    finally:
+        slot.release()
+
 # endpoint returns hello world
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
 
-async def transcribe_audio(file_path):
+async def transcribe_audio(source):
+    """
+    Transcribe a Deepgram source, either {'buffer': file} or {'url': audio_url}
+    """
     if not DEEPGRAM_API_KEY:
         # Return mock transcription with timestamps for development
         return {
@@ -99,111 +228,360 @@ async def transcribe_audio(file_path):
         }
     
     try:
+        # Configure transcription options
+        options = PrerecordedOptions(
+            smart_format=True,
+            model="nova-2",
+            language="en-US",
+            utterances=True,  # Enable utterances to get paragraph breaks
+            detect_topics=True,  # Detect topic changes
+            punctuate=True,
+            diarize=True,  # Speaker diarization if multiple speakers
+        )
         
+        # URL sources are fetched by Deepgram directly, skipping the upload hop
+        prerecorded = deepgram.listen.prerecorded.v("1")
+        transcribe = prerecorded.transcribe_url if "url" in source else prerecorded.transcribe_file
+
+        # Send the audio to Deepgram off the event loop; callers hold a DG_SEM slot
+        response = await asyncio.to_thread(transcribe, source, options)
         
-        # Initialize the Deepgram client
-        deepgram = DeepgramClient(DEEPGRAM_API_KEY)
-        
-        # Open the audio file
-        with open(file_path, 'rb') as buffer_data:
-            # Configure transcription options
-            payload = { 'buffer': buffer_data }
-            options = PrerecordedOptions(
-                smart_format=True,
-                model="nova-2",
-                language="en-US",
-                utterances=True,  # Enable utterances to get paragraph breaks
-                detect_topics=True,  # Detect topic changes
-                punctuate=True,
-                diarize=True,  # Speaker diarization if multiple speakers
-            )
-            
-            # Send the audio to Deepgram and get the response
-            response = deepgram.listen.prerecorded.v("1").transcribe_file(payload, options)
-            
-            # Extract full transcript
-            transcript = response.results.channels[0].alternatives[0].transcript
-            
-            # Extract sentences with timestamps            
-            paragraphs = response.results.channels[0].alternatives[0].paragraphs.paragraphs
+        # Extract full transcript
+        transcript = response.results.channels[0].alternatives[0].transcript
+        
+        # Extract sentences with timestamps            
+        paragraphs = response.results.channels[0].alternatives[0].paragraphs.paragraphs
 
-            
-            # Format word timestamps
-            formatted_sentences = []
-
-            for paragraph in paragraphs:
-                for sentence in paragraph.sentences:
-                    formatted_sentences.append({
-                        "text": sentence.text,
-                        "start": sentence.start,
-                        "end": sentence.end
-                    })
-            
-            return {
-                "transcript": transcript,
-                "sentences": formatted_sentences
-            }
+        # Format sentence timestamps
+        formatted_sentences = [
+            {"text": sentence.text, "start": sentence.start, "end": sentence.end}
+            for paragraph in paragraphs
+            for sentence in paragraph.sentences
+        ]
+        
+        return {
+            "transcript": transcript,
+            "sentences": formatted_sentences
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during transcription: {str(e)}")
 
-@app.post("/api/transcribe")
-async def transcribe_audio_endpoint(file: UploadFile = File(...)):
+class UploadTarget(BaseTarget):
+    """
+    Multipart target that collects the uploaded file into an in-memory spool
+    and hashes it as it arrives
+    """
+    def __init__(self):
+        super().__init__()
+        # Long recordings roll over into a disk-backed temp file
+        self.file = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_SIZE, dir=SPOOL_DIR)
+        self.hasher = hashlib.sha256()
+        self.header = b""
+        self.size = 0
+        self.received = False
+
+    def on_data_received(self, chunk: bytes):
+        self.received = True
+        if len(self.header) < AUDIO_HEADER_SIZE:
+            self.header += chunk[:AUDIO_HEADER_SIZE - len(self.header)]
+        self.size += len(chunk)
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+def is_audio_header(header: bytes) -> bool:
+    """
+    Check the first bytes of an upload against known audio file signatures
+    """
+    return any(header.startswith(signature, offset) for offset, signature in AUDIO_SIGNATURES)
+
+# Define response models for the transcription endpoints
+class TranscriptSentence(BaseModel):
+    text: str
+    start: float
+    end: float
+
+class TranscriptionResponse(BaseModel):
+    success: bool
+    file_id: Optional[str] = None
+    filename: Optional[str] = None
+    transcription: str
+    sentences: List[TranscriptSentence]
+
+@app.post("/api/transcribe", response_model=TranscriptionResponse)
+async def transcribe_audio_endpoint(request: Request):
     """
     Endpoint to upload an audio file and get its transcription
     """
-    # Validate file type (optional)
-    if not file.content_type.startswith('audio/'):
-        raise HTTPException(status_code=400, detail="File must be an audio file")
-    
-    # Create a unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save uploaded file
+    # Turn away oversized uploads up front when the client declares the size
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Audio file is too large")
+
+    # Parse the multipart body as it streams in instead of materializing an UploadFile
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
-    
-    # Transcribe the audio
+        parser = StreamingFormDataParser(headers=request.headers)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Request must be multipart/form-data")
+    target = UploadTarget()
+    parser.register("file", target)
+
+    # Take an upload slot before reading the body so queued uploads are not spooled
+    slot = await acquire_slot(UPLOAD_SEM)
     try:
-        transcription_result = await transcribe_audio(file_path)
-        
-        # Return the transcription with timestamps
+        # Read the uploaded file
+        header_checked = False
+        body_size = 0
+        try:
+            async for chunk in request.stream():
+                body_size += len(chunk)
+                if body_size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail="Audio file is too large")
+
+                if target.size + len(chunk) > AUDIO_SPOOL_MAX_SIZE:
+                    # Past the in-memory limit the spool writes to disk, so keep it off the event loop
+                    await asyncio.to_thread(parser.data_received, chunk)
+                else:
+                    parser.data_received(chunk)
+
+                # Validate file type from its leading bytes before reading the rest
+                if not header_checked and len(target.header) >= AUDIO_HEADER_SIZE:
+                    if not is_audio_header(target.header):
+                        raise HTTPException(status_code=400, detail="File must be an audio file")
+                    header_checked = True
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+
+        if not target.received:
+            raise HTTPException(status_code=400, detail="No audio file uploaded")
+
+        # Files shorter than the header size are only checked once fully read
+        if not header_checked and not is_audio_header(target.header):
+            raise HTTPException(status_code=400, detail="File must be an audio file")
+
+        # Identical uploads reuse the earlier transcription
+        file_id = target.hasher.hexdigest()[:16]
+        transcription_result = transcription_cache.get(file_id)
+        if transcription_result is not None:
+            transcription_cache.move_to_end(file_id)
+        else:
+            # Transcribe the audio straight from the spooled upload
+            target.file.seek(0)
+            async with limit_concurrency(DG_SEM):
+                transcription_result = await transcribe_audio({'buffer': target.file})
+            transcription_cache[file_id] = transcription_result
+            if len(transcription_cache) > TRANSCRIPTION_CACHE_SIZE:
+                transcription_cache.popitem(last=False)
+        
+        # Return the transcription with timestamps; the response model lets FastAPI
+        # serialize the (possibly thousands of) sentences straight to JSON bytes
         return {
             "success": True,
-            "filename": file.filename,
+            "file_id": file_id,
+            "filename": target.multipart_filename,
             "transcription": transcription_result["transcript"],
             "sentences": transcription_result["sentences"]
         }
-    except Exception as e:
-        # Clean up the file in case of error
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise e
     finally:
-        # Clean up after processing (optional - you might want to keep files)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        slot.release()
+        target.file.close()
+
+# Define request model for transcribing hosted audio
+class TranscribeURLRequest(BaseModel):
+    audio_url: str
 
-def generate_bullet_summary(transcript):
+@app.post("/api/transcribe-url", response_model=TranscriptionResponse)
+async def transcribe_url_endpoint(request: TranscribeURLRequest):
     """
-    Generate a bullet-point summary of a transcript using Groq API
+    Endpoint to transcribe an audio file that is already hosted at a public URL
     """
-    if not GROQ_API_KEY or not groq_client:
-        # Return mock summary if Groq API is not available
-        return """
-        • This is a mock summary for development purposes.
-        • Please set the GROQ_API_KEY environment variable for actual summary generation.
-        • The real summary would extract key points from the transcript.
-        • It would be organized as a bullet-point list for easy reading.
+    if not request.audio_url.startswith(("https://", "http://")):
+        raise HTTPException(status_code=400, detail="Invalid audio URL format")
+
+    async with limit_concurrency(DG_SEM):
+        transcription_result = await transcribe_audio({'url': request.audio_url})
+
+    # Return the transcription with timestamps
+    return {
+        "success": True,
+        "filename": os.path.basename(request.audio_url.split("?")[0]),
+        "transcription": transcription_result["transcript"],
+        "sentences": transcription_result["sentences"]
+    }
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    """
+    Load the sentence embedding model once and reuse it
+    """
+    return SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+
+# Identifies a transcript in the cache: exact key, character length, and the
+# (mean embedding, chunk embeddings) fingerprint used for near-duplicate matching
+CacheKey = namedtuple("CacheKey", ["key", "length", "fingerprint"])
+
+class SemanticCache:
+    """
+    LRU cache of generated content keyed on transcript text. Exact repeats are
+    found by SHA-256 digest; near-duplicates by cosine similarity of embeddings.
+    The cache is best-effort: any failure is treated as a miss.
+    """
+    def __init__(self, max_entries: int = 256, ttl: float = 24 * 60 * 60,
+                 threshold: float = 0.92, chunk_threshold: float = 0.85,
+                 min_length_ratio: float = 0.9, sample_chunks: int = 8):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.chunk_threshold = chunk_threshold
+        self.min_length_ratio = min_length_ratio
+        self.sample_chunks = sample_chunks
+        self.entries = OrderedDict()  # (scope, digest) -> (CacheKey, value, created_at)
+        self.lock = threading.Lock()
+
+    def embed(self, text: str):
         """
-        
+        Return (mean_embedding, chunk_embeddings) for evenly spaced chunks of the text
+        """
+        # MiniLM only reads the first few hundred tokens, so embed evenly spaced
+        # chunks to represent the whole transcript rather than just its opening
+        chunks = create_chunks(text) or [text]
+        step = max(1, len(chunks) // self.sample_chunks)
+        sample = chunks[::step][:self.sample_chunks]
+        chunk_embeddings = get_embedding_model().encode(sample, normalize_embeddings=True)
+        embedding = chunk_embeddings.mean(axis=0)
+        return embedding / np.linalg.norm(embedding), chunk_embeddings
+
+    def _is_near_duplicate(self, cache_key: CacheKey, candidate: CacheKey) -> bool:
+        # Averaged embeddings of related lectures drift together, so also require
+        # a similar length and agreement between every pair of aligned chunks
+        shorter, longer = sorted((cache_key.length, candidate.length))
+        if longer == 0 or shorter / longer < self.min_length_ratio:
+            return False
+        chunks, candidate_chunks = cache_key.fingerprint[1], candidate.fingerprint[1]
+        if chunks.shape != candidate_chunks.shape:
+            return False
+        return bool(np.min(np.sum(chunks * candidate_chunks, axis=1)) >= self.chunk_threshold)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl
+        for key in [key for key, entry in self.entries.items() if entry[2] < cutoff]:
+            del self.entries[key]
+
+    def lookup(self, text: str, scope: Any = None, fingerprint=None):
+        """
+        Return (cached_value, cache_key). cached_value is None on a miss; pass
+        cache_key to store(). A fingerprint from another cache's key can be
+        passed to avoid embedding the same text twice.
+        """
+        try:
+            return self._lookup(text, scope, fingerprint)
+        except Exception as e:
+            print(f"Warning: Cache lookup failed, treating as a miss: {str(e)}")
+            return None, None
+
+    def _lookup(self, text: str, scope: Any, fingerprint):
+        key = (scope, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        with self.lock:
+            self._evict_expired()
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][1], None
+            candidates = [(k, entry[0]) for k, entry in self.entries.items()
+                          if k[0] == scope and entry[0].fingerprint is not None]
+
+        if fingerprint is None:
+            try:
+                fingerprint = self.embed(text)
+            except Exception as e:
+                # Still cache exact repeats if the embedding model is unavailable
+                print(f"Warning: Could not embed text for the cache: {str(e)}")
+                return None, CacheKey(key, len(text), None)
+
+        cache_key = CacheKey(key, len(text), fingerprint)
+        if candidates:
+            similarities = np.stack([c.fingerprint[0] for _, c in candidates]) @ fingerprint[0]
+            for best in np.argsort(similarities)[::-1]:
+                if similarities[best] < self.threshold:
+                    break
+                candidate_key, candidate = candidates[best]
+                if not self._is_near_duplicate(cache_key, candidate):
+                    continue
+                with self.lock:
+                    entry = self.entries.get(candidate_key)
+                    if entry is not None:
+                        self.entries.move_to_end(candidate_key)
+                        return entry[1], cache_key
+        return None, cache_key
+
+    def store(self, cache_key: Optional[CacheKey], value):
+        if cache_key is None:
+            return
+        try:
+            with self.lock:
+                self.entries[cache_key.key] = (cache_key, value, time.time())
+                self.entries.move_to_end(cache_key.key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        except Exception as e:
+            print(f"Warning: Cache store failed: {str(e)}")
+
+summary_cache = SemanticCache()
+quiz_cache = SemanticCache()
+
+# Tokenizer used to budget transcripts against the Llama 3 context window (128k tokens).
+# The default is an ungated copy of the Llama 3.1 tokenizer so no Hub token is needed
+TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "NousResearch/Meta-Llama-3.1-8B")
+
+# Transcript token budget per model. The small summary model gets a tighter
+# default so its requests stay within Groq's per-request limits
+MAX_TRANSCRIPT_TOKENS = {
+    SUMMARY_MODEL: int(os.getenv("SUMMARY_MAX_TRANSCRIPT_TOKENS", "30000")),
+    QUIZ_MODEL: int(os.getenv("QUIZ_MAX_TRANSCRIPT_TOKENS", "110000")),
+}
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Load the tokenizer once, or return None if it is unavailable
+    """
     try:
-        # Define the prompt for generating bullet point summaries
-        prompt = f"""
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(TOKENIZER_MODEL)
+    except Exception as e:
+        print(f"Warning: Could not load tokenizer {TOKENIZER_MODEL} ({str(e)}). Falling back to character-based truncation.")
+        return None
+
+def truncate_transcript(transcript, model=QUIZ_MODEL):
+    """
+    Truncate very long transcripts to fit the given model's token budget
+    """
+    max_tokens = MAX_TRANSCRIPT_TOKENS[model]
+
+    # Byte-level BPE never produces more tokens than UTF-8 bytes, so short
+    # transcripts can skip tokenization entirely
+    if len(transcript.encode("utf-8")) <= max_tokens:
+        return transcript
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        # Roughly 4 characters per token for English text
+        max_length = max_tokens * 4
+        if len(transcript) <= max_length:
+            return transcript
+        return transcript[:max_length] + "\n[Transcript truncated due to length...]"
+
+    token_ids = tokenizer.encode(transcript, add_special_tokens=False)
+    if len(token_ids) <= max_tokens:
+        return transcript
+    return tokenizer.decode(token_ids[:max_tokens]) + "\n[Transcript truncated due to length...]"
+
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that creates concise, well-organized bullet point summaries."
+
+# Fixed part of the summary prompt; only the transcript is appended per request
+SUMMARY_PROMPT_PREFIX = """
         Create a concise and well-organized bullet point summary for the provided transcript.
 
         - Identify key points and important details from the transcript.
@@ -248,15 +626,34 @@ def generate_bullet_summary(transcript):
         - Avoid redundant information.
         
         Transcript:
-        {transcript}
+        """
+
+def get_summary_prompt(transcript):
+    """
+    Create the user prompt for generating bullet point summaries
+    """
+    return SUMMARY_PROMPT_PREFIX + transcript
+
+def generate_bullet_summary(transcript, cache_key=None):
+    """
+    Generate a bullet-point summary of a transcript using Groq API, storing it under cache_key
+    """
+    if not GROQ_API_KEY or not groq_client:
+        # Return mock summary if Groq API is not available
+        return """
+        • This is a mock summary for development purposes.
+        • Please set the GROQ_API_KEY environment variable for actual summary generation.
+        • The real summary would extract key points from the transcript.
+        • It would be organized as a bullet-point list for easy reading.
         """
         
+    try:
         # Call Groq API to generate the summary
         response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # Using newer Llama 3.3 70B model
+            model=SUMMARY_MODEL,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that creates concise, well-organized bullet point summaries."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": get_summary_prompt(transcript)}
             ],
             temperature=0.3,  # Lower temperature for more focused responses
             max_tokens=1024
@@ -264,6 +661,8 @@ def generate_bullet_summary(transcript):
         
         # Extract the summary from the response
         summary = response.choices[0].message.content
+        if summary:
+            summary_cache.store(cache_key, summary)
         return summary
     except Exception as e:
         return f"Error generating summary: {str(e)}"
@@ -286,90 +685,184 @@ async def generate_summary_endpoint(request: SummaryRequest):
             raise HTTPException(status_code=400, detail="Transcript is required")
             
         # Truncate very long transcripts to prevent API limits
-        # Most LLM APIs have context limits
-        max_length = 16000  # Adjust based on the model's context window
-        truncated_transcript = request.transcript[:max_length]
-        if len(request.transcript) > max_length:
-            truncated_transcript += "\n[Transcript truncated due to length...]"
+        truncated_transcript = await asyncio.to_thread(truncate_transcript, request.transcript, SUMMARY_MODEL)
             
-        summary = generate_bullet_summary(truncated_transcript)
+        # Serve cache hits without waiting for a Groq slot
+        summary, cache_key = await asyncio.to_thread(summary_cache.lookup, truncated_transcript)
+        if summary is None:
+            async with limit_concurrency(GROQ_SEM):
+                summary = await asyncio.to_thread(generate_bullet_summary, truncated_transcript, cache_key)
         
         return {
             "success": True,
             "summary": summary
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
-def generate_quiz_questions(transcript, num_questions=5):
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    correct_answer: int
+
+    @field_validator("correct_answer", mode="before")
+    @classmethod
+    def coerce_correct_answer(cls, value):
+        # Ensure correct_answer is an integer, defaulting to the first option
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        return value if isinstance(value, int) else 0
+
+    @model_validator(mode="after")
+    def check_correct_answer_range(self):
+        # Default to first option if the index is out of range
+        if not 0 <= self.correct_answer < len(self.options):
+            self.correct_answer = 0
+        return self
+
+QUIZ_ADAPTER = TypeAdapter(List[QuizQuestion])
+
+def parse_quiz_questions(quiz_data):
     """
-    Generate multiple-choice quiz questions based on a transcript using Groq API
+    Extract and validate the questions array from a parsed quiz response
     """
-    if not GROQ_API_KEY or not groq_client:
-        # Return mock questions if Groq API is not available
-        return [
-            {
-                "question": "What is the main topic of this mock transcript?",
-                "options": [
-                    "Artificial Intelligence",
-                    "Machine Learning",
-                    "Data Science",
-                    "Mock Data"
-                ],
-                "correct_answer": 3
-            },
-            {
-                "question": "This is a mock question because...",
-                "options": [
-                    "The GROQ_API_KEY is not set",
-                    "The transcript is too short",
-                    "The system is in testing mode",
-                    "All of the above"
-                ],
-                "correct_answer": 0
-            }
-        ]
-    
+    # If the JSON is wrapped in an object, extract the questions array
+    if isinstance(quiz_data, dict) and "questions" in quiz_data:
+        questions = quiz_data["questions"]
+    # If it's directly an array
+    elif isinstance(quiz_data, list):
+        questions = quiz_data
+    else:
+        # Try to find any array in the response
+        for key, value in quiz_data.items():
+            if isinstance(value, list) and len(value) > 0:
+                questions = value
+                break
+        else:
+            # Fallback - couldn't find a valid array
+            raise ValueError("Could not extract questions array from response")
+
+    # Validate the whole list at once, dropping only malformed questions if any fail
     try:
-        # Define the prompt for generating quiz questions
-        prompt = f"""
-        Create a quiz with {num_questions} multiple-choice questions based on the following transcript.
+        validated_questions = QUIZ_ADAPTER.validate_python(questions)
+    except ValidationError:
+        validated_questions = []
+        for q in questions:
+            try:
+                validated_questions.append(QuizQuestion.model_validate(q))
+            except ValidationError:
+                continue
+
+    return QUIZ_ADAPTER.dump_python(validated_questions)
+
+QUIZ_SYSTEM_PROMPT = "You are a helpful assistant that creates educational quizzes. You always respond with valid JSON."
+
+# Fixed part of the quiz prompt; __N__ is replaced with the number of questions
+# Requirements shared by the JSON-array and streaming quiz prompts
+QUIZ_REQUIREMENTS = """
+        Create a quiz with __N__ multiple-choice questions based on the following transcript.
         
         Requirements:
-        - Generate exactly {num_questions} questions (or fewer if the transcript is very short)
+        - Generate exactly __N__ questions (or fewer if the transcript is very short)
         - Each question should have 4 options (A, B, C, D)
         - Only one option should be correct
         - Questions should test understanding of key concepts from the transcript
         - Questions should vary in difficulty (some easy, some moderate, some challenging)
         - Include the correct answer index (0-based, where 0 is the first option)
         
-        Format your response as a JSON array of objects, with each object having:
+"""
+
+QUIZ_PROMPT_TEMPLATE = QUIZ_REQUIREMENTS + """        Format your response as a JSON array of objects, with each object having:
         - "question": The question text
         - "options": An array of 4 possible answers
         - "correct_answer": The index (0-3) of the correct answer
         
         Example format:
         [
-          {{
+          {
             "question": "What is the main topic discussed in the lecture?",
             "options": ["Option A", "Option B", "Option C", "Option D"],
             "correct_answer": 2
-          }},
+          },
           ...more questions...
         ]
         
         Important: Your entire response should be valid JSON that can be parsed. Do not include any explanatory text outside the JSON array.
         
         Transcript:
-        {transcript}
         """
+
+@lru_cache(maxsize=None)
+def fill_prompt_template(template, num_questions):
+    """
+    Substitute the number of questions into a prompt template, once per distinct value
+    """
+    return template.replace("__N__", str(num_questions))
+
+def get_quiz_prompt(transcript, num_questions):
+    """
+    Create the user prompt for generating quiz questions as a JSON array
+    """
+    return fill_prompt_template(QUIZ_PROMPT_TEMPLATE, num_questions) + transcript
+
+QUIZ_STREAM_PROMPT_TEMPLATE = QUIZ_REQUIREMENTS + """        Format your response as newline-delimited JSON: one complete JSON object per line, one line per question, with each object having:
+        - "question": The question text
+        - "options": An array of 4 possible answers
+        - "correct_answer": The index (0-3) of the correct answer
+        
+        Example format:
+        {"question": "What is the main topic discussed in the lecture?", "options": ["Option A", "Option B", "Option C", "Option D"], "correct_answer": 2}
+        {"question": "Which example was used to explain the concept?", "options": ["Option A", "Option B", "Option C", "Option D"], "correct_answer": 0}
         
+        Important: Do not wrap the objects in an array, do not split an object across lines, and do not include any explanatory text.
+        
+        Transcript:
+        """
+
+def get_quiz_stream_prompt(transcript, num_questions):
+    """
+    Create the user prompt for generating quiz questions one JSON object per line
+    """
+    return fill_prompt_template(QUIZ_STREAM_PROMPT_TEMPLATE, num_questions) + transcript
+
+def generate_quiz_questions(transcript, num_questions=5, cache_key=None):
+    """
+    Generate multiple-choice quiz questions based on a transcript using Groq API, storing them under cache_key
+    """
+    if not GROQ_API_KEY or not groq_client:
+        # Return mock questions if Groq API is not available
+        return [
+            {
+                "question": "What is the main topic of this mock transcript?",
+                "options": [
+                    "Artificial Intelligence",
+                    "Machine Learning",
+                    "Data Science",
+                    "Mock Data"
+                ],
+                "correct_answer": 3
+            },
+            {
+                "question": "This is a mock question because...",
+                "options": [
+                    "The GROQ_API_KEY is not set",
+                    "The transcript is too short",
+                    "The system is in testing mode",
+                    "All of the above"
+                ],
+                "correct_answer": 0
+            }
+        ]
+    
+    try:
         # Call Groq API to generate the questions
         response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # Using newer Llama 3.3 70B model
+            model=QUIZ_MODEL,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that creates educational quizzes. You always respond with valid JSON."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": QUIZ_SYSTEM_PROMPT},
+                {"role": "user", "content": get_quiz_prompt(transcript, num_questions)}
             ],
             temperature=0.5,  # Slightly higher temperature for creative questions
             max_tokens=2048,
@@ -380,40 +873,12 @@ def generate_quiz_questions(transcript, num_questions=5):
         quiz_text = response.choices[0].message.content
         
         # Parse JSON
-        import json
         try:
-            quiz_data = json.loads(quiz_text)
-            # If the JSON is wrapped in an object, extract the questions array
-            if isinstance(quiz_data, dict) and "questions" in quiz_data:
-                questions = quiz_data["questions"]
-            # If it's directly an array
-            elif isinstance(quiz_data, list):
-                questions = quiz_data
-            else:
-                # Try to find any array in the response
-                for key, value in quiz_data.items():
-                    if isinstance(value, list) and len(value) > 0:
-                        questions = value
-                        break
-                else:
-                    # Fallback - couldn't find a valid array
-                    raise ValueError("Could not extract questions array from response")
-                
-            # Validate and clean up questions
-            validated_questions = []
-            for q in questions:
-                if "question" in q and "options" in q and "correct_answer" in q:
-                    # Ensure correct_answer is an integer
-                    if isinstance(q["correct_answer"], str) and q["correct_answer"].isdigit():
-                        q["correct_answer"] = int(q["correct_answer"])
-                    
-                    # Ensure correct_answer is within valid range
-                    if not isinstance(q["correct_answer"], int) or q["correct_answer"] < 0 or q["correct_answer"] >= len(q["options"]):
-                        # Default to first option if invalid
-                        q["correct_answer"] = 0
-                        
-                    validated_questions.append(q)
+            quiz_data = orjson.loads(quiz_text)
+            validated_questions = parse_quiz_questions(quiz_data)
             
+            if validated_questions:
+                quiz_cache.store(cache_key, validated_questions)
             return validated_questions
         except Exception as e:
             return [{"question": f"Error parsing quiz questions: {str(e)}",
@@ -430,11 +895,6 @@ class QuizRequest(BaseModel):
     transcript: str
     num_questions: Optional[int] = 5
 
-class QuizQuestion(BaseModel):
-    question: str
-    options: List[str]
-    correct_answer: int
-
 class QuizResponse(BaseModel):
     success: bool
     questions: List[QuizQuestion]
@@ -449,23 +909,338 @@ async def generate_quiz_endpoint(request: QuizRequest):
             raise HTTPException(status_code=400, detail="Transcript is required")
             
         # Truncate very long transcripts to prevent API limits
-        max_length = 16000  # Adjust based on the model's context window
-        truncated_transcript = request.transcript[:max_length]
-        if len(request.transcript) > max_length:
-            truncated_transcript += "\n[Transcript truncated due to length...]"
+        truncated_transcript = await asyncio.to_thread(truncate_transcript, request.transcript)
             
         # Ensure num_questions is within reasonable limits
         num_questions = max(1, min(request.num_questions, 10))
         
-        questions = generate_quiz_questions(truncated_transcript, num_questions)
+        # Serve cache hits without waiting for a Groq slot
+        questions, cache_key = await asyncio.to_thread(quiz_cache.lookup, truncated_transcript, num_questions)
+        if questions is None:
+            async with limit_concurrency(GROQ_SEM):
+                questions = await asyncio.to_thread(generate_quiz_questions, truncated_transcript, num_questions, cache_key)
         
         return {
             "success": True,
             "questions": questions
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
+ANALYSIS_SYSTEM_PROMPT = "You are a helpful assistant that creates concise lecture summaries and educational quizzes. You always respond with valid JSON."
+
+# One prompt that shares the transcript between the summary and quiz tasks
+ANALYSIS_PROMPT_TEMPLATE = """
+        Analyze the following transcript and produce two things: a bullet point summary and a multiple-choice quiz.
+
+        Summary requirements:
+        - Identify key points and important details from the transcript.
+        - Use markdown headers (#) for main sections and bullet points (*) for key points.
+        - Cover the main topics, key arguments, important examples, and conclusions.
+        - Focus on clarity and brevity and avoid redundant information.
+
+        Quiz requirements:
+        - Generate exactly __N__ questions (or fewer if the transcript is very short)
+        - Each question should have 4 options (A, B, C, D)
+        - Only one option should be correct
+        - Questions should test understanding of key concepts from the transcript
+        - Questions should vary in difficulty (some easy, some moderate, some challenging)
+        - Include the correct answer index (0-based, where 0 is the first option)
+
+        Format your response as a JSON object with exactly these fields:
+        - "summary": The markdown summary as a single string
+        - "questions": An array of objects, each with "question", "options" (4 strings) and "correct_answer" (0-3)
+
+        Important: Your entire response should be valid JSON that can be parsed. Do not include any explanatory text outside the JSON object.
+
+        Transcript:
+        """
+
+def lookup_analysis(transcript, num_questions=5):
+    """
+    Look up the summary and quiz caches for a transcript, embedding it only once
+    """
+    cached_summary, summary_key = summary_cache.lookup(transcript)
+    cached_questions, quiz_key = quiz_cache.lookup(
+        transcript, scope=num_questions,
+        fingerprint=summary_key.fingerprint if summary_key else None
+    )
+    return cached_summary, summary_key, cached_questions, quiz_key
+
+def generate_analysis(transcript, num_questions=5, summary_key=None, quiz_key=None):
+    """
+    Generate both the bullet-point summary and the quiz with a single Groq call
+    """
+    if not GROQ_API_KEY or not groq_client:
+        # Fall back to the individual mock generators
+        return {
+            "summary": generate_bullet_summary(transcript),
+            "questions": generate_quiz_questions(transcript, num_questions)
+        }
+
+    try:
+        # Call Groq API once for both the summary and the quiz
+        response = groq_client.chat.completions.create(
+            model=QUIZ_MODEL,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": fill_prompt_template(ANALYSIS_PROMPT_TEMPLATE, num_questions) + transcript}
+            ],
+            temperature=0.4,
+            max_tokens=3072,
+            response_format={"type": "json_object"}  # Ensure JSON response
+        )
+
+        analysis = orjson.loads(response.choices[0].message.content)
+        summary = analysis.get("summary") or ""
+        # The model sometimes returns the summary as a list of bullet lines
+        if isinstance(summary, list):
+            summary = "\n".join(str(line) for line in summary)
+        if not isinstance(summary, str):
+            raise ValueError(f"Unexpected summary type: {type(summary).__name__}")
+        questions = parse_quiz_questions(analysis.get("questions") or [])
+
+        # Populate the per-task caches so the individual endpoints reuse this result
+        if summary:
+            summary_cache.store(summary_key, summary)
+        if questions:
+            quiz_cache.store(quiz_key, questions)
+
+        return {"summary": summary, "questions": questions}
+    except Exception as e:
+        return {
+            "summary": f"Error generating summary: {str(e)}",
+            "questions": [{"question": f"Error generating quiz: {str(e)}",
+                           "options": ["Error", "Try again", "Check API key", "Contact support"],
+                           "correct_answer": 2}]
+        }
+
+# Define response model for the combined analysis endpoint
+class AnalyzeResponse(BaseModel):
+    success: bool
+    summary: str
+    questions: List[QuizQuestion]
+
+@app.post("/api/analyze", response_model=AnalyzeResponse)
+async def analyze_endpoint(request: QuizRequest):
+    """
+    Endpoint to generate both the summary and the quiz from a transcript in one call
+    """
+    try:
+        if not request.transcript:
+            raise HTTPException(status_code=400, detail="Transcript is required")
+
+        # Truncate very long transcripts to prevent API limits
+        truncated_transcript = await asyncio.to_thread(truncate_transcript, request.transcript)
+
+        # Ensure num_questions is within reasonable limits
+        num_questions = max(1, min(request.num_questions, 10))
+
+        # Serve cache hits without waiting for a Groq slot
+        cached_summary, summary_key, cached_questions, quiz_key = await asyncio.to_thread(
+            lookup_analysis, truncated_transcript, num_questions
+        )
+        if cached_summary is not None and cached_questions is not None:
+            analysis = {"summary": cached_summary, "questions": cached_questions}
+        else:
+            async with limit_concurrency(GROQ_SEM):
+                analysis = await asyncio.to_thread(
+                    generate_analysis, truncated_transcript, num_questions, summary_key, quiz_key
+                )
+
+        return {
+            "success": True,
+            "summary": analysis["summary"],
+            "questions": analysis["questions"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating analysis: {str(e)}")
+
+@app.post("/api/generate-summary-stream")
+async def generate_summary_stream_endpoint(request: SummaryRequest):
+    """
+    Endpoint to generate a bullet-point summary with streaming response
+    """
+    if not request.transcript:
+        raise HTTPException(status_code=400, detail="Transcript is required")
+
+    # Truncate very long transcripts to prevent API limits
+    truncated_transcript = await asyncio.to_thread(truncate_transcript, request.transcript, SUMMARY_MODEL)
+
+    # Look up the cache and take a Groq slot before the 200 is sent, so a busy
+    # server still answers with a 429
+    cached_summary, cache_key, slot = None, None, None
+    if GROQ_API_KEY and groq_client:
+        cached_summary, cache_key = await asyncio.to_thread(summary_cache.lookup, truncated_transcript)
+        if cached_summary is None:
+            slot = await acquire_slot(GROQ_SEM)
+
+    return StreamingResponse(
+        generate_summary_stream(truncated_transcript, cached_summary, cache_key, slot),
+        media_type="text/event-stream",
+        # Also release the slot if the client disconnects before the stream starts
+        background=BackgroundTask(slot.release) if slot else None
+    )
+
+async def generate_summary_stream(transcript, cached_summary=None, cache_key=None, slot=None):
+    """
+    Stream a bullet-point summary from the model as it is generated, releasing the Groq slot when done
+    """
+    try:
+        if not GROQ_API_KEY or not groq_client:
+            # Fall back to the mock summary in a single chunk
+            yield f"data: {json.dumps({'chunk': generate_bullet_summary(transcript)})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+            return
+
+        if cached_summary is not None:
+            yield f"data: {json.dumps({'chunk': cached_summary})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+            return
+
+        # Call Groq API with streaming enabled
+        stream = await asyncio.to_thread(
+            groq_client.chat.completions.create,
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": get_summary_prompt(transcript)}
+            ],
+            temperature=0.3,  # Lower temperature for more focused responses
+            max_tokens=1024,
+            stream=True
+        )
+
+        # Pull chunks off the event loop so other requests keep being served
+        summary = ""
+        chunks = iter(stream)
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            content = chunk.choices[0].delta.content
+            if content:
+                summary += content
+                yield f"data: {json.dumps({'chunk': content})}\n\n"
+
+        if summary:
+            summary_cache.store(cache_key, summary)
+        yield f"data: {json.dumps({'done': True})}\n\n"
+
+    except Exception as e:
+        yield f"data: {json.dumps({'chunk': f'Error generating summary: {str(e)}'})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+    finally:
+        if slot:
+            slot.release()
+
+@app.post("/api/generate-quiz-stream")
+async def generate_quiz_stream_endpoint(request: QuizRequest):
+    """
+    Endpoint to generate a quiz with streaming response, one question per event
+    """
+    if not request.transcript:
+        raise HTTPException(status_code=400, detail="Transcript is required")
+
+    # Truncate very long transcripts to prevent API limits
+    truncated_transcript = await asyncio.to_thread(truncate_transcript, request.transcript)
+
+    # Ensure num_questions is within reasonable limits
+    num_questions = max(1, min(request.num_questions, 10))
+
+    # Look up the cache and take a Groq slot before the 200 is sent, so a busy
+    # server still answers with a 429
+    cached_questions, cache_key, slot = None, None, None
+    if GROQ_API_KEY and groq_client:
+        cached_questions, cache_key = await asyncio.to_thread(quiz_cache.lookup, truncated_transcript, num_questions)
+        if cached_questions is None:
+            slot = await acquire_slot(GROQ_SEM)
+
+    return StreamingResponse(
+        generate_quiz_stream(truncated_transcript, num_questions, cached_questions, cache_key, slot),
+        media_type="text/event-stream",
+        # Also release the slot if the client disconnects before the stream starts
+        background=BackgroundTask(slot.release) if slot else None
+    )
+
+async def generate_quiz_stream(transcript, num_questions=5, cached_questions=None, cache_key=None, slot=None):
+    """
+    Stream quiz questions from the model, emitting each one as soon as its line is complete,
+    and release the Groq slot when done
+    """
+    try:
+        if not GROQ_API_KEY or not groq_client:
+            # Fall back to the mock questions
+            for question in generate_quiz_questions(transcript, num_questions):
+                yield f"data: {json.dumps({'question': question})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+            return
+
+        if cached_questions is not None:
+            for question in cached_questions:
+                yield f"data: {json.dumps({'question': question})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+            return
+
+        questions = []
+        buffer = ""
+
+        def parse_line(line):
+            # Skip blank lines, stray text and anything that fails validation
+            line = line.strip().rstrip(",")
+            if not line.startswith("{"):
+                return []
+            try:
+                return parse_quiz_questions([orjson.loads(line)])
+            except Exception:
+                return []
+
+        # Call Groq API with streaming enabled, asking for one JSON object per line
+        stream = await asyncio.to_thread(
+            groq_client.chat.completions.create,
+            model=QUIZ_MODEL,
+            messages=[
+                {"role": "system", "content": QUIZ_SYSTEM_PROMPT},
+                {"role": "user", "content": get_quiz_stream_prompt(transcript, num_questions)}
+            ],
+            temperature=0.5,  # Slightly higher temperature for creative questions
+            max_tokens=2048,
+            stream=True
+        )
+
+        # Pull chunks off the event loop so other requests keep being served
+        chunks = iter(stream)
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            buffer += content
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                for question in parse_line(line):
+                    questions.append(question)
+                    yield f"data: {json.dumps({'question': question})}\n\n"
+
+        # Handle a final line without a trailing newline
+        for question in parse_line(buffer):
+            questions.append(question)
+            yield f"data: {json.dumps({'question': question})}\n\n"
+
+        if questions:
+            quiz_cache.store(cache_key, questions)
+        yield f"data: {json.dumps({'done': True})}\n\n"
+
+    except Exception as e:
+        error_question = {"question": f"Error generating quiz: {str(e)}",
+                          "options": ["Error", "Try again", "Check API key", "Contact support"],
+                          "correct_answer": 2}
+        yield f"data: {json.dumps({'question': error_question})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+    finally:
+        if slot:
+            slot.release()
+
 # Define the chat message model
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
@@ -508,12 +1283,15 @@ async def chat_with_tutor(request: ChatRequest):
         for msg in request.messages:
             formatted_messages.append({"role": msg.role, "content": msg.content})
         
-        # Generate response
-        response = generate_socratic_response(formatted_messages)
+        # Generate response off the event loop, holding a Groq slot
+        async with limit_concurrency(GROQ_SEM):
+            response = await asyncio.to_thread(generate_socratic_response, formatted_messages)
         
         return {
             "message": response
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
@@ -588,21 +1366,28 @@ async def chat_with_tutor_stream(request: ChatRequest):
         for msg in request.messages:
             formatted_messages.append({"role": msg.role, "content": msg.content})
         
+        # Take a Groq slot before the 200 is sent, so a busy server still answers with a 429
+        slot = await acquire_slot(GROQ_SEM) if GROQ_API_KEY and groq_client else None
+
         # Return streaming response
         return StreamingResponse(
-            generate_streaming_response(formatted_messages),
-            media_type="text/event-stream"
+            generate_streaming_response(formatted_messages, slot),
+            media_type="text/event-stream",
+            # Also release the slot if the client disconnects before the stream starts
+            background=BackgroundTask(slot.release) if slot else None
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         error_json = json.dumps({"error": str(e)})
         async def error_stream():
             yield f"data: {error_json}\n\n"
         return StreamingResponse(error_stream(), media_type="text/event-stream")
 
-async def generate_streaming_response(messages):
+async def generate_streaming_response(messages, slot=None):
     """
-    Generate a streaming response from the model - optimized version
+    Generate a streaming response from the model - optimized version, releasing the Groq slot when done
     """
     if not GROQ_API_KEY or not groq_client:
         # Mock streaming for development without API key
@@ -619,7 +1404,8 @@ async def generate_streaming_response(messages):
     
     try:
         # Call Groq API with streaming enabled
-        stream = groq_client.chat.completions.create(
+        stream = await asyncio.to_thread(
+            groq_client.chat.completions.create,
             model="llama-3.3-70b-versatile",
             messages=messages,
             temperature=0.7,
@@ -631,8 +1417,10 @@ async def generate_streaming_response(messages):
         buffer = ""
         last_send_time = time.time()
         
-        # Stream the response chunks with optimized buffering
-        for chunk in stream:
+        # Stream the response chunks with optimized buffering, pulling them off
+        # the event loop so other requests keep being served
+        chunks = iter(stream)
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
             content = chunk.choices[0].delta.content
             if content:
                 buffer += content
@@ -662,6 +1450,9 @@ async def generate_streaming_response(messages):
         error_message = f"I'm having trouble processing your question. Could you try asking in a different way? (Error: {str(e)})"
         yield f"data: {json.dumps({'chunk': error_message})}\n\n"
         yield f"data: {json.dumps({'done': True})}\n\n"
+    finally:
+        if slot:
+            slot.release()
 
 def get_youtube_subtitles(youtube_url):
     try:
@@ -802,12 +1593,15 @@ async def chat_with_direct_answers(request: ChatRequest):
         for msg in request.messages:
             formatted_messages.append({"role": msg.role, "content": msg.content})
         
-        # Generate response
-        response = generate_direct_response(formatted_messages)
+        # Generate response off the event loop, holding a Groq slot
+        async with limit_concurrency(GROQ_SEM):
+            response = await asyncio.to_thread(generate_direct_response, formatted_messages)
         
         return {
             "message": response
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
@@ -864,12 +1658,19 @@ async def chat_with_direct_stream(request: ChatRequest):
         for msg in request.messages:
             formatted_messages.append({"role": msg.role, "content": msg.content})
         
+        # Take a Groq slot before the 200 is sent, so a busy server still answers with a 429
+        slot = await acquire_slot(GROQ_SEM) if GROQ_API_KEY and groq_client else None
+
         # Return streaming response
         return StreamingResponse(
-            generate_streaming_response(formatted_messages),
-            media_type="text/event-stream"
+            generate_streaming_response(formatted_messages, slot),
+            media_type="text/event-stream",
+            # Also release the slot if the client disconnects before the stream starts
+            background=BackgroundTask(slot.release) if slot else None
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         error_json = json.dumps({"error": str(e)})
         async def error_stream():
@@ -933,6 +1734,15 @@ async def youtube_transcribe_v2_endpoint(request: YouTubeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing YouTube transcription: {str(e)}")
 
+def remove_file(file_path: str):
+    """
+    Delete a temporary file, ignoring it if it is already gone
+    """
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+
 # Add new models for PDF processing
 class PDFSummaryResponse(BaseModel):
     success: bool
@@ -942,7 +1752,7 @@ class PDFSummaryResponse(BaseModel):
     error: Optional[str] = None
 
 @app.post("/api/process-pdf", response_model=PDFSummaryResponse)
-async def process_pdf_endpoint(file: UploadFile = File(...)):
+async def process_pdf_endpoint(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Endpoint to process PDF files and generate summaries using RAG
     """
@@ -952,106 +1762,67 @@ async def process_pdf_endpoint(file: UploadFile = File(...)):
 
         # Create a temporary file to store the uploaded PDF
         temp_file_path = os.path.join(UPLOAD_DIR, f"temp_{uuid.uuid4()}.pdf")
-        try:
-            # Save the uploaded file temporarily
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
-            # Extract text from PDF
-            pdf_text = extract_text_from_pdf_file(temp_file_path)
-            
-            # Create chunks
-            chunks = create_chunks(pdf_text)
-            
-            if not chunks:
-                raise HTTPException(status_code=400, detail="Could not extract text from PDF")
-
-            # Generate summary using Groq (simpler approach without RAG for now)
-            if not GROQ_API_KEY or not groq_client:
-                raise HTTPException(
-                    status_code=500, 
-                    detail="GROQ_API_KEY not configured"
-                )
-                
-            prompt = f"""
-            Create a concise and well-organized bullet point summary for the provided transcript.
 
-            - Identify key points and important details from the transcript.
-            - Summarize information in clear and concise bullet points.
-            - Ensure that the bullet points capture the essence of the conversation or content.
-            - Organize the bullets logically to maintain the flow of information.
+        # Clean up the temporary file once the response has been sent
+        background_tasks.add_task(remove_file, temp_file_path)
 
-            # Steps
+        # Save the uploaded file temporarily
+        # Unbuffered destination since copyfileobj already writes 1 MiB chunks
+        with open(temp_file_path, "wb", buffering=0) as buffer:
+            shutil.copyfileobj(file.file, buffer, length=UPLOAD_COPY_BUFSIZE)
 
-            1. Read through the transcript to understand the main topics and key details.
-            2. Identify and note down significant points, arguments, or data.
-            3. Summarize these points into clear, concise bullet points.
-            4. Ensure logical flow and organization of bullet points.
-            5. Review the bullet points to ensure they are representative of the transcript's content.
-
-            # Output Format
-
-            1. Use markdown headers (#) for main sections
-            2. Use bullet points (*) for key points
-            3. Organize content into clear sections
-            4. Include:
-            - Main topics/themes
-            - Key points and arguments
-            - Important details and examples
-            - Conclusions or takeaways
-
-            # Examples
-
-            ## Example Input
-            [Transcript of a conversation or presentation.]
+        # Extract text from PDF
+        pdf_text = extract_text_from_pdf_file(temp_file_path)
+        
+        # Create chunks
+        chunks = create_chunks(pdf_text)
+        
+        if not chunks:
+            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
 
-            ## Example Output
-            - Introduction of the main topic
-            - Key argument 1: [Summary of the argument]
-            - Key argument 2: [Summary of the argument]
-            - Closing remarks: [Summary of conclusions]
-            (Note: In a realistic example, more detailed key points should be included.) 
+        # Generate summary using Groq (simpler approach without RAG for now)
+        if not GROQ_API_KEY or not groq_client:
+            raise HTTPException(
+                status_code=500, 
+                detail="GROQ_API_KEY not configured"
+            )
 
-            # Notes
+        # Look up the quiz cache before taking a Groq slot
+        questions, quiz_key = await asyncio.to_thread(quiz_cache.lookup, pdf_text, 5)
 
-            - Focus on clarity and brevity.
-            - Avoid redundant information.
-            
-            Transcript:
-            {pdf_text}
-            """
-            
-            response = groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # Using newer Llama 3.3 70B model
+        async with limit_concurrency(GROQ_SEM):
+            response = await asyncio.to_thread(
+                groq_client.chat.completions.create,
+                model=SUMMARY_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates concise, well-organized bullet point summaries."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": get_summary_prompt(pdf_text)}
                 ],
                 temperature=0.3,  # Lower temperature for more focused responses
                 max_tokens=1024
             )
 
-            questions = generate_quiz_questions(pdf_text, 5)
-                
-            summary = response.choices[0].message.content
+            if questions is None:
+                questions = await asyncio.to_thread(generate_quiz_questions, pdf_text, 5, quiz_key)
             
-            return {
-                "success": True,
-                "transcript": pdf_text,
-                "summary": summary,
-                "questions": questions,
-                "error": None
-            }
-
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+        summary = response.choices[0].message.content
+        
+        return {
+            "success": True,
+            "transcript": pdf_text,
+            "summary": summary,
+            "questions": questions,
+            "error": None
+        }
                 
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "success": False,
             "summary": "",
+            "questions": [],
+            "transcript": "",
             "error": str(e)
         }
 
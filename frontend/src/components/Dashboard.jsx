@@ -76,31 +76,9 @@ export default function Dashboard() {
 
 				// If successful, generate summary and quiz
 				if (result) {
-					// Call backend to generate summary
-					const summaryResponse = await fetch(
-						`${process.env.NEXT_PUBLIC_API_URL}/api/generate-summary`,
-						{
-							method: "POST",
-							headers: {
-								"Content-Type": "application/json",
-							},
-							body: JSON.stringify({
-								transcript: result.transcription,
-							}),
-						}
-					);
-
-					let summary = "";
-					if (summaryResponse.ok) {
-						const summaryData = await summaryResponse.json();
-						summary = summaryData.success
-							? summaryData.summary
-							: "Failed to generate summary";
-					}
-
-					// Call backend to generate quiz questions
-					const quizResponse = await fetch(
-						`${process.env.NEXT_PUBLIC_API_URL}/api/generate-quiz`,
+					// Call backend to generate summary and quiz questions in one request
+					const analysisResponse = await fetch(
+						`${process.env.NEXT_PUBLIC_API_URL}/api/analyze`,
 						{
 							method: "POST",
 							headers: {
@@ -113,10 +91,14 @@ export default function Dashboard() {
 						}
 					);
 
+					let summary = "";
 					let questions = [];
-					if (quizResponse.ok) {
-						const quizData = await quizResponse.json();
-						questions = quizData.success ? quizData.questions : [];
+					if (analysisResponse.ok) {
+						const analysisData = await analysisResponse.json();
+						summary = analysisData.success
+							? analysisData.summary
+							: "Failed to generate summary";
+						questions = analysisData.success ? analysisData.questions : [];
 					}
 
 					// Update output data with all information
@@ -197,31 +179,9 @@ export default function Dashboard() {
 						loading: true, // Still loading until summary and quiz are done
 					}));
 
-					// Call backend to generate summary
-					const summaryResponse = await fetch(
-						`${process.env.NEXT_PUBLIC_API_URL}/api/generate-summary`,
-						{
-							method: "POST",
-							headers: {
-								"Content-Type": "application/json",
-							},
-							body: JSON.stringify({
-								transcript: youtubeData.transcription,
-							}),
-						}
-					);
-
-					let summary = "";
-					if (summaryResponse.ok) {
-						const summaryData = await summaryResponse.json();
-						summary = summaryData.success
-							? summaryData.summary
-							: "Failed to generate summary";
-					}
-
-					// Call backend to generate quiz questions
-					const quizResponse = await fetch(
-						`${process.env.NEXT_PUBLIC_API_URL}/api/generate-quiz`,
+					// Call backend to generate summary and quiz questions in one request
+					const analysisResponse = await fetch(
+						`${process.env.NEXT_PUBLIC_API_URL}/api/analyze`,
 						{
 							method: "POST",
 							headers: {
@@ -234,10 +194,14 @@ export default function Dashboard() {
 						}
 					);
 
+					let summary = "";
 					let questions = [];
-					if (quizResponse.ok) {
-						const quizData = await quizResponse.json();
-						questions = quizData.success ? quizData.questions : [];
+					if (analysisResponse.ok) {
+						const analysisData = await analysisResponse.json();
+						summary = analysisData.success
+							? analysisData.summary
+							: "Failed to generate summary";
+						questions = analysisData.success ? analysisData.questions : [];
 					}
 
 					// Update output data with all information